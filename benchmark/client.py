@@ -4,53 +4,306 @@ using the length-prefixed JSON wire protocol.
 """
 
 import socket
+import selectors
 import struct
 import json
 import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    # Fall back to the stdlib codec when orjson isn't installed
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    _loads = json.loads
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Scatter-gather writes are POSIX-only (not available on Windows)
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+
+# Linux-only; the kernel drops out of quick-ACK mode on its own, so it is
+# re-armed before every response read
+_HAS_QUICKACK = hasattr(socket, "TCP_QUICKACK")
+
+# Room for a full window of pipelined INSERT frames in flight
+SOCKET_BUFFER_SIZE = 1 << 20
+
+# Userspace read buffer: a header and its body usually arrive in one recv
+READ_BUFFER_SIZE = 65536
 
 
 class DocDBClient:
     """Client for connecting to a DocDB server."""
 
-    def __init__(self, host: str = "127.0.0.1", port: int = 6379):
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379,
+                 reader_thread: bool = False, async_io: bool = False,
+                 use_msgpack: bool = False):
+        if reader_thread and async_io:
+            raise ValueError("reader_thread and async_io are mutually exclusive")
+        if use_msgpack and msgpack is None:
+            raise ImportError("use_msgpack=True requires the msgpack package")
         self.host = host
         self.port = port
         self.sock = None
+        self._hdr = struct.Struct("!I")
+        self._rfile = None
+        self._find_cache = {}
+        self._prefixes = {}
+
+        # Requests may be sent as MessagePack; the server always answers JSON
+        self._use_msgpack = use_msgpack
+        if use_msgpack:
+            self._encode = msgpack.Packer(use_bin_type=True).pack
+            self._tail = b""
+        else:
+            self._encode = _dumps
+            self._tail = b"}"
+
+        # Background reader mode: responses resolve Futures in request order
+        self._use_reader = reader_thread
+        self._reader = None
+        self._pending = deque()
+        self._send_lock = threading.Lock()
+        self._reader_error = None
+
+        # Non-blocking mode: submit() buffers frames, _drain_one() moves bytes
+        self._async_io = async_io
+        self._submitted = deque()  # Futures of submit() calls awaiting replies
+        self._selector = None
+        self._sel_events = 0
+        self._txbuf = bytearray()
+        self._rxacc = bytearray()
 
     def connect(self):
         """Establish TCP connection to the server."""
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
         self.sock.connect((self.host, self.port))
+        if _HAS_QUICKACK:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+
+        if not self._async_io:
+            self._rfile = self.sock.makefile("rb", buffering=READ_BUFFER_SIZE)
+
+        if self._use_reader:
+            self._reader_error = None
+            self._reader = threading.Thread(target=self._reader_loop, daemon=True)
+            self._reader.start()
+
+        if self._async_io:
+            self.sock.setblocking(False)
+            self._selector = selectors.DefaultSelector()
+            self._sel_events = selectors.EVENT_READ
+            self._selector.register(self.sock, self._sel_events)
+            self._txbuf.clear()
+            self._rxacc.clear()
+            self._submitted.clear()
 
     def close(self):
         """Close the connection."""
         if self.sock:
+            if self._selector:
+                self._selector.close()
+                self._selector = None
+            if self._reader:
+                # Unblock the reader's recv before closing the socket
+                try:
+                    self.sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                self._reader.join()
+                self._reader = None
+            if self._rfile:
+                self._rfile.close()
+                self._rfile = None
             self.sock.close()
             self.sock = None
 
     def _send(self, request: dict) -> dict:
         """Send a request and receive a response."""
-        payload = json.dumps(request).encode("utf-8")
-        header = struct.pack("!I", len(payload))
-        self.sock.sendall(header + payload)
+        return self._send_payload(self._encode(request))
+
+    def _send_payload(self, payload: bytes) -> dict:
+        """Send an already-serialized request and receive a response."""
+        if self._reader:
+            return self._send_async_payload(payload).result()
+        if self._async_io:
+            self._queue_frame(payload)
+            return self._drain_one()
+
+        self._send_frame(payload)
+        return self._recv_response()
+
+    def _prefix(self, cmd: str, collection: str, field: str = None) -> bytes:
+        """Serialized head of a `cmd` request on `collection`, ending with
+        the `field` key when given. Hot commands splice their encoded
+        argument and self._tail onto this instead of building and encoding
+        a whole request dict."""
+        key = (cmd, collection, field)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            enc = self._encode
+            if self._use_msgpack:
+                # fixmap header carrying the entry count, then key/value pairs
+                prefix = bytes([0x80 | (3 if field else 2)])
+                prefix += enc("cmd") + enc(cmd) + enc("collection") + enc(collection)
+                if field:
+                    prefix += enc(field)
+            else:
+                prefix = b'{"cmd":' + enc(cmd) + b',"collection":' + enc(collection)
+                if field:
+                    prefix += b',' + enc(field) + b':'
+            self._prefixes[key] = prefix
+        return prefix
+
+    def submit(self, request: dict) -> Future:
+        """Queue a request for sending without waiting (async_io mode).
+        Bytes go out as later _drain_one() calls make progress, so the next
+        request can be serialized while earlier ones are still in flight.
+        The returned Future resolves to the response once it has been read,
+        by drain_submitted() or by the next synchronous call."""
+        future = Future()
+        self._queue_frame(self._encode(request))
+        self._submitted.append(future)
+        return future
+
+    def drain_submitted(self):
+        """Read responses until every submit() Future is resolved."""
+        try:
+            while self._submitted:
+                resp = self._read_frame()
+                self._submitted.popleft().set_result(resp)
+        except Exception as e:
+            # The stream is out of sync; nothing still queued can be matched
+            while self._submitted:
+                self._submitted.popleft().set_exception(e)
+            raise
+
+    def _queue_frame(self, payload: bytes):
+        self._txbuf += self._hdr.pack(len(payload))
+        self._txbuf += payload
+
+    def _drain_one(self) -> dict:
+        """Return the response to the oldest request not made via submit().
+        Replies to earlier submit() calls arrive first and resolve their
+        Futures on the way."""
+        self.drain_submitted()
+        return self._read_frame()
+
+    def _read_frame(self) -> dict:
+        """Flush queued requests and read until one full response frame is
+        available, waiting on the selector for writability/readability."""
+        while True:
+            if len(self._rxacc) >= 4:
+                resp_len = self._hdr.unpack_from(self._rxacc)[0]
+                if len(self._rxacc) >= 4 + resp_len:
+                    resp = _loads(bytes(self._rxacc[4:4 + resp_len]))
+                    del self._rxacc[:4 + resp_len]
+                    return resp
+
+            events = selectors.EVENT_READ
+            if self._txbuf:
+                events |= selectors.EVENT_WRITE
+            if events != self._sel_events:
+                self._selector.modify(self.sock, events)
+                self._sel_events = events
 
+            for _, mask in self._selector.select():
+                try:
+                    if mask & selectors.EVENT_WRITE:
+                        sent = self.sock.send(self._txbuf)
+                        del self._txbuf[:sent]
+                    if mask & selectors.EVENT_READ:
+                        if _HAS_QUICKACK:
+                            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+                        chunk = self.sock.recv(65536)
+                        if not chunk:
+                            raise ConnectionError("Server closed connection")
+                        self._rxacc += chunk
+                except BlockingIOError:
+                    pass
+
+    def _send_frame(self, payload: bytes):
+        """Write one length-prefixed frame without copying header + payload."""
+        header = self._hdr.pack(len(payload))
+        if not _HAS_SENDMSG:
+            self.sock.sendall(header + payload)
+            return
+
+        sent = self.sock.sendmsg([header, payload])
+        if sent < len(header):
+            self.sock.sendall(header[sent:])
+            self.sock.sendall(payload)
+        elif sent < len(header) + len(payload):
+            # Partial write — push the remainder of the payload
+            self.sock.sendall(memoryview(payload)[sent - len(header):])
+
+    def send_async(self, request: dict) -> Future:
+        """Send a request without waiting; the returned Future resolves to
+        the response. Requires reader_thread=True."""
+        if not self._reader:
+            raise RuntimeError("send_async requires a client created with reader_thread=True")
+        return self._send_async_payload(self._encode(request))
+
+    def _send_async_payload(self, payload: bytes) -> Future:
+        future = Future()
+        # The server answers each connection in order, so queueing the
+        # Future and writing the frame under one lock keeps them matched
+        with self._send_lock:
+            if self._reader_error:
+                raise self._reader_error
+            self._pending.append(future)
+            self._send_frame(payload)
+        return future
+
+    def _reader_loop(self):
+        """Read framed responses and resolve pending Futures in order."""
+        try:
+            while True:
+                resp = self._recv_response()
+                self._pending.popleft().set_result(resp)
+        except (ConnectionError, OSError):
+            error = ConnectionError("Server closed connection")
+        except Exception as e:
+            # An undecodable or unexpected response leaves the stream out of
+            # sync; fail everything rather than let callers block forever
+            error = ConnectionError(f"Reader thread failed: {e!r}")
+            error.__cause__ = e
+        with self._send_lock:
+            self._reader_error = error
+            while self._pending:
+                self._pending.popleft().set_exception(error)
+
+    def _recv_response(self) -> dict:
+        """Read one length-prefixed response from the socket."""
+        if _HAS_QUICKACK:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
         # Read 4-byte response header
         resp_header = self._recv_exact(4)
-        resp_len = struct.unpack("!I", resp_header)[0]
+        resp_len = self._hdr.unpack(resp_header)[0]
 
         # Read response body
         resp_body = self._recv_exact(resp_len)
-        return json.loads(resp_body.decode("utf-8"))
+        return _loads(resp_body)
 
     def _recv_exact(self, n: int) -> bytes:
-        """Read exactly n bytes from socket."""
-        data = b""
-        while len(data) < n:
-            chunk = self.sock.recv(n - len(data))
-            if not chunk:
-                raise ConnectionError("Server closed connection")
-            data += chunk
+        """Read exactly n bytes through the buffered socket reader."""
+        data = self._rfile.read(n)
+        if len(data) < n:
+            raise ConnectionError("Server closed connection")
         return data
 
     # ---- High-level API ----
@@ -64,41 +317,117 @@ class DocDBClient:
         return resp.get("result", [])
 
     def create_collection(self, name: str) -> bool:
+        self._find_cache.clear()
         resp = self._send({"cmd": "createCollection", "name": name})
         return resp.get("ok", False)
 
     def drop_collection(self, name: str) -> bool:
+        self._find_cache.clear()
         resp = self._send({"cmd": "dropCollection", "name": name})
         return resp.get("ok", False)
 
     def insert(self, collection: str, document: dict) -> dict:
-        resp = self._send({
-            "cmd": "insert",
-            "collection": collection,
-            "document": document,
-        })
-        return resp
+        return self.insert_raw(self.encode_insert(collection, document))
+
+    def encode_insert(self, collection: str, document: dict) -> bytes:
+        """Serialize an insert request ahead of time, for insert_raw()."""
+        return self._prefix("insert", collection, "document") + self._encode(document) + self._tail
+
+    def insert_raw(self, payload: bytes) -> dict:
+        """Run an insert request already serialized by encode_insert()."""
+        self._find_cache.clear()
+        return self._send_payload(payload)
+
+    def insert_many(self, collection: str, documents: list, batch_size: int = 1000) -> int:
+        """Insert documents with one insertMany request per `batch_size`
+        documents. Returns the number of documents inserted; elements that
+        aren't documents (e.g. None) are skipped by the server. Raises
+        RuntimeError if the server rejects a batch — earlier batches stay
+        inserted."""
+        self._find_cache.clear()
+        inserted = 0
+        for start in range(0, len(documents), batch_size):
+            resp = self._send({
+                "cmd": "insertMany",
+                "collection": collection,
+                "documents": documents[start:start + batch_size],
+            })
+            if not resp.get("ok", False):
+                raise RuntimeError(f"insertMany failed after {inserted} documents: "
+                                   f"{resp.get('error', 'unknown error')}")
+            inserted += resp.get("inserted", 0)
+        return inserted
+
+    def insert_pipelined(self, collection: str, documents: list, window: int = 256) -> list:
+        """Insert documents by sending up to `window` requests back-to-back,
+        then draining their responses — one round trip per window instead
+        of one per document."""
+        self._find_cache.clear()
+        prefix = self._prefix("insert", collection, "document")
+        if self._reader:
+            futures = [self._send_async_payload(prefix + self._encode(doc) + self._tail)
+                       for doc in documents]
+            return [f.result() for f in futures]
+        if self._async_io:
+            for doc in documents:
+                self._queue_frame(prefix + self._encode(doc) + self._tail)
+            return [self._drain_one() for _ in documents]
+
+        responses = []
+        for start in range(0, len(documents), window):
+            batch = documents[start:start + window]
+            buf = bytearray()
+            for doc in batch:
+                payload = prefix + self._encode(doc) + self._tail
+                buf += self._hdr.pack(len(payload))
+                buf += payload
+            self.sock.sendall(buf)
+
+            for _ in batch:
+                responses.append(self._recv_response())
+        return responses
 
     def find(self, collection: str, filter_doc: dict = None) -> list:
-        req = {"cmd": "find", "collection": collection}
+        return self.find_raw(self.encode_find(collection, filter_doc))
+
+    def encode_find(self, collection: str, filter_doc: dict = None) -> bytes:
+        """Serialize a find request once, for repeated use with find_raw()."""
         if filter_doc:
-            req["filter"] = filter_doc
-        resp = self._send(req)
+            return self._prefix("find", collection, "filter") + self._encode(filter_doc) + self._tail
+        return self._prefix("find", collection) + self._tail
+
+    def find_raw(self, payload: bytes) -> list:
+        """Run a find request already serialized by encode_find()."""
+        resp = self._send_payload(payload)
         return resp.get("result", [])
 
+    def find_cached(self, collection: str, filter_doc: dict = None) -> list:
+        """Like find(), but repeated queries are answered from a client-side
+        cache until the next write through this client. The returned list
+        is shared with the cache and must not be mutated."""
+        try:
+            key = (collection, frozenset((filter_doc or {}).items()))
+        except TypeError:
+            # Nested filter values aren't hashable — skip the cache
+            return self.find(collection, filter_doc)
+
+        result = self._find_cache.get(key)
+        if result is None:
+            result = self._find_cache[key] = self.find(collection, filter_doc)
+        return result
+
     def count(self, collection: str) -> int:
-        resp = self._send({"cmd": "count", "collection": collection})
+        resp = self._send_payload(self._prefix("count", collection) + self._tail)
         return resp.get("count", 0)
 
     def delete(self, collection: str, filter_doc: dict) -> int:
-        resp = self._send({
-            "cmd": "delete",
-            "collection": collection,
-            "filter": filter_doc,
-        })
+        self._find_cache.clear()
+        prefix = self._prefix("delete", collection, "filter")
+        resp = self._send_payload(prefix + self._encode(filter_doc) + self._tail)
         return resp.get("deleted", 0)
 
     def update(self, collection: str, filter_doc: dict, update_doc: dict) -> int:
+        self._find_cache.clear()
         resp = self._send({
             "cmd": "update",
             "collection": collection,
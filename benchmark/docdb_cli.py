@@ -6,7 +6,9 @@ Connects to the DocDB TCP server via the wire protocol.
 
 import sys
 import os
+import re
 import readline  # enables arrow keys, history in input()
+from collections import deque
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from client import DocDBClient
@@ -22,27 +24,71 @@ B = "\033[1m"     # bold
 X = "\033[0m"     # reset
 
 
+# Precomputed color templates for output formatting
+_KEY_FMT = f'{C}"{{}}"{X}: '
+_STR_FMT = f'{G}"{{}}"{X}'
+_NUM_FMT = f"{Y}{{}}{X}"
+_TRUE = f"{M}true{X}"
+_FALSE = f"{M}false{X}"
+_NULL = f"{D}null{X}"
+_DOC_OPEN = f"{D}{{ {X}"
+_DOC_SEP = f"{D}, {X}"
+_DOC_CLOSE = f"{D} }}{X}"
+
+
 def format_value(v):
-    """Format a JSON value with colors."""
-    if isinstance(v, str):
-        return f'{G}"{v}"{X}'
-    elif isinstance(v, bool):
-        return f'{M}{"true" if v else "false"}{X}'
-    elif isinstance(v, (int, float)):
-        return f'{Y}{v}{X}'
-    elif isinstance(v, dict):
-        return format_doc(v)
-    elif isinstance(v, list):
-        return "[" + ", ".join(format_value(x) for x in v) + "]"
-    return f"{D}null{X}"
+    """Format a JSON value with colors. Nested containers are walked with
+    an explicit stack, so deep documents can't hit the recursion limit."""
+    out = []
+    stack = deque([(False, v)])
+    pop, push = stack.pop, stack.append
+    while stack:
+        literal, v = pop()
+        if literal:
+            out.append(v)
+            continue
+        t = type(v)
+        if t is dict:
+            # Push in reverse so keys come back off the stack in order
+            push((True, _DOC_CLOSE))
+            items = list(v.items())
+            for i in range(len(items) - 1, -1, -1):
+                k, val = items[i]
+                push((False, val))
+                push((True, (_DOC_SEP if i else "") + _KEY_FMT.format(k)))
+            out.append(_DOC_OPEN)
+        elif t is list:
+            push((True, "]"))
+            for i in range(len(v) - 1, -1, -1):
+                push((False, v[i]))
+                if i:
+                    push((True, ", "))
+            out.append("[")
+        else:
+            fmt = _SCALAR_FORMATTERS.get(t)
+            out.append(fmt(v) if fmt else _NULL)
+    return "".join(out)
 
 
 def format_doc(doc):
     """Pretty-print a document with ANSI colors."""
-    parts = []
-    for k, v in doc.items():
-        parts.append(f'{C}"{k}"{X}: {format_value(v)}')
-    return f"{D}{{ {X}" + f"{D}, {X}".join(parts) + f"{D} }}{X}"
+    return format_value(doc)
+
+
+# Dispatch on exact type (bool must not fall through to int)
+_SCALAR_FORMATTERS = {
+    str: _STR_FMT.format,
+    bool: lambda v: _TRUE if v else _FALSE,
+    int: _NUM_FMT.format,
+    float: _NUM_FMT.format,
+}
+
+
+def print_docs(docs):
+    """Write all documents plus a count footer in a single stdout write."""
+    out = [format_doc(doc) for doc in docs]
+    out.append(f"{D}({len(docs)} documents){X}\n")
+    sys.stdout.write("\n".join(out))
 
 
 def parse_json_arg(s):
@@ -61,11 +107,26 @@ def parse_json_arg(s):
             return None
 
 
+# Single-level (non-nested) spans, keyed by (open_ch, close_ch)
+_FLAT_SPAN_RE = {
+    (o, c): re.compile(f"{re.escape(o)}[^{re.escape(o + c)}]*{re.escape(c)}")
+    for o, c in (("{", "}"), ("(", ")"), ("[", "]"))
+}
+
+
 def extract_between(s, open_ch, close_ch):
     """Extract content between matching braces/parens."""
     start = s.find(open_ch)
     if start == -1:
         return ""
+
+    # Fast path: no nesting before the first closing brace
+    flat = _FLAT_SPAN_RE.get((open_ch, close_ch))
+    if flat:
+        m = flat.match(s, start)
+        if m:
+            return m.group()
+
     depth = 0
     for i in range(start, len(s)):
         if s[i] == open_ch:
@@ -93,7 +154,9 @@ def main():
             i += 1
 
     # Connect
-    db = DocDBClient(host, port)
+    # Responses are read on a background thread, so an interrupted command
+    # leaves the connection in sync instead of stranding a half-read reply
+    db = DocDBClient(host, port, reader_thread=True)
     try:
         db.connect()
     except ConnectionRefusedError:
@@ -202,9 +265,7 @@ def main():
                     print(f"{R}Error: no collection selected.{X}")
                     continue
                 docs = db.find(current_collection)
-                for doc in docs:
-                    print(format_doc(doc))
-                print(f"{D}({len(docs)} documents){X}")
+                print_docs(docs)
 
             elif line.startswith("db.find("):
                 if not current_collection:
@@ -217,9 +278,7 @@ def main():
                 if filter_doc is None:
                     filter_doc = {}
                 docs = db.find(current_collection, filter_doc if filter_doc else None)
-                for doc in docs:
-                    print(format_doc(doc))
-                print(f"{D}({len(docs)} documents){X}")
+                print_docs(docs)
 
             elif line.startswith("db.delete("):
                 if not current_collection:
@@ -296,6 +355,8 @@ def main():
                 print(f"{R}Unknown command: {X}{line}")
                 print(f"{D}Type 'help' for available commands.{X}")
 
+        except KeyboardInterrupt:
+            print(f"\n{Y}Interrupted{X}")
         except ConnectionError:
             print(f"{R}Error: Lost connection to server{X}")
             break
@@ -12,6 +12,8 @@
 #include <arpa/inet.h>
 #include <signal.h>
 #include <algorithm>
+#include <stdexcept>
+#include <cmath>
 
 #define MAX_EVENTS 64
 #define READ_BUF_SIZE 8192
@@ -288,6 +290,28 @@ std::string Server::DocToJSON(const BsonDocument& doc) {
     return ss.str();
 }
 
+// Index one past the bracket/brace that closes the one at s[pos]. Quoted
+// strings (and \" escapes inside them) are skipped, so delimiters in
+// string values don't count.
+static size_t SkipBalanced(const std::string& s, size_t pos) {
+    char open = s[pos];
+    char close = (open == '[') ? ']' : '}';
+    int depth = 0;
+    bool in_string = false;
+    for (; pos < s.size(); pos++) {
+        char c = s[pos];
+        if (in_string) {
+            if (c == '\\') pos++;
+            else if (c == '"') in_string = false;
+            continue;
+        }
+        if (c == '"') in_string = true;
+        else if (c == open) depth++;
+        else if (c == close && --depth == 0) return pos + 1;
+    }
+    return pos;
+}
+
 // Reuse the CLI's JSON parser logic (flat objects)
 BsonDocument Server::ParseJSON(const std::string& json) {
     BsonDocument doc;
@@ -334,15 +358,17 @@ BsonDocument Server::ParseJSON(const std::string& json) {
             pos = val_end + 1;
         } else if (s[pos] == '{') {
             // Nested object — find matching brace
-            int depth = 0;
             size_t obj_start = pos;
-            for (; pos < s.size(); pos++) {
-                if (s[pos] == '{') depth++;
-                if (s[pos] == '}') { depth--; if (depth == 0) { pos++; break; } }
-            }
+            pos = SkipBalanced(s, pos);
             std::string nested = s.substr(obj_start, pos - obj_start);
             auto sub = std::make_shared<BsonDocument>(ParseJSON(nested));
             doc.Add(key, sub);
+        } else if (s[pos] == '[') {
+            // Array — find matching bracket
+            size_t arr_start = pos;
+            pos = SkipBalanced(s, pos);
+            std::string array = s.substr(arr_start, pos - arr_start);
+            doc.Add(key, std::make_shared<BsonDocument>(ParseJSONArray(array)));
         } else if (s[pos] == 't' || s[pos] == 'f') {
             if (s.substr(pos, 4) == "true") { doc.Add(key, true); pos += 4; }
             else if (s.substr(pos, 5) == "false") { doc.Add(key, false); pos += 5; }
@@ -367,13 +393,205 @@ BsonDocument Server::ParseJSON(const std::string& json) {
     return doc;
 }
 
+// Arrays are stored BSON-style: a document keyed "0", "1", ... "n-1"
+BsonDocument Server::ParseJSONArray(const std::string& json) {
+    BsonDocument arr;
+    arr.is_array = true;
+    size_t start = json.find('[');
+    size_t end = json.rfind(']');
+    if (start == std::string::npos || end == std::string::npos || end <= start) return arr;
+
+    // Split on top-level commas, skipping over nested objects/arrays and strings
+    size_t index = 0;
+    size_t elem_start = start + 1;
+    int depth = 0;
+    bool in_string = false;
+    for (size_t pos = start + 1; pos <= end; pos++) {
+        char c = json[pos];
+        if (in_string) {
+            if (c == '\\') pos++;
+            else if (c == '"') in_string = false;
+            continue;
+        }
+        if (c == '"') in_string = true;
+        else if (c == '{' || c == '[') depth++;
+        else if (c == '}' || (c == ']' && pos != end)) depth--;
+        else if ((c == ',' && depth == 0) || pos == end) {
+            std::string elem = json.substr(elem_start, pos - elem_start);
+            elem_start = pos + 1;
+
+            size_t first = elem.find_first_not_of(" \t\n\r");
+            if (first == std::string::npos) continue;
+            elem = elem.substr(first);
+
+            std::string idx_key = std::to_string(index++);
+            if (elem[0] == '{') {
+                arr.Add(idx_key, std::make_shared<BsonDocument>(ParseJSON(elem)));
+            } else if (elem[0] == '[') {
+                arr.Add(idx_key, std::make_shared<BsonDocument>(ParseJSONArray(elem)));
+            } else {
+                // Scalars reuse the object parser via a single-field wrapper.
+                // null (or anything unparsed) still takes its slot, so the
+                // element count always matches the array.
+                BsonDocument wrapped = ParseJSON("{\"v\":" + elem + "}");
+                auto it = wrapped.elements.find("v");
+                arr.Add(idx_key, it != wrapped.elements.end() ? it->second : BsonValue(nullptr));
+            }
+        }
+    }
+    return arr;
+}
+
+// ---- MessagePack requests ----
+// Decodes onto the same BsonValue types ParseJSON produces. Arrays are
+// stored BSON-style like ParseJSONArray, nil elements included; nil map
+// values are dropped, matching documents that simply omit the field.
+
+namespace {
+
+struct MsgPackReader {
+    const uint8_t* p;
+    const uint8_t* end;
+
+    void Need(size_t n) {
+        if (static_cast<size_t>(end - p) < n) throw std::runtime_error("truncated msgpack payload");
+    }
+
+    uint64_t ReadBE(size_t n) {
+        Need(n);
+        uint64_t v = 0;
+        for (size_t i = 0; i < n; i++) v = (v << 8) | p[i];
+        p += n;
+        return v;
+    }
+
+    std::string ReadBytes(size_t n) {
+        Need(n);
+        std::string s(reinterpret_cast<const char*>(p), n);
+        p += n;
+        return s;
+    }
+
+    // JSON (and so every reply built by DocToJSON) has no NaN/Inf
+    static BsonValue Finite(double v) {
+        if (!std::isfinite(v)) throw std::runtime_error("msgpack floats must be finite");
+        return v;
+    }
+
+    static BsonValue Int(int64_t v) {
+        if (v >= INT32_MIN && v <= INT32_MAX) return static_cast<int32_t>(v);
+        return v;
+    }
+
+    BsonDocument ReadMap(size_t n) {
+        BsonDocument doc;
+        for (size_t i = 0; i < n; i++) {
+            BsonValue key = ReadValue();
+            if (!std::holds_alternative<std::string>(key))
+                throw std::runtime_error("msgpack map keys must be strings");
+            BsonValue val = ReadValue();
+            if (!std::holds_alternative<std::nullptr_t>(val))
+                doc.Add(std::get<std::string>(key), val);
+        }
+        return doc;
+    }
+
+    BsonDocument ReadArray(size_t n) {
+        BsonDocument arr;
+        arr.is_array = true;
+        for (size_t i = 0; i < n; i++) arr.Add(std::to_string(i), ReadValue());
+        return arr;
+    }
+
+    BsonValue ReadValue() {
+        Need(1);
+        uint8_t tag = *p++;
+        if (tag <= 0x7f) return static_cast<int32_t>(tag);
+        if (tag >= 0xe0) return static_cast<int32_t>(static_cast<int8_t>(tag));
+        if ((tag & 0xf0) == 0x80) return std::make_shared<BsonDocument>(ReadMap(tag & 0x0f));
+        if ((tag & 0xf0) == 0x90) return std::make_shared<BsonDocument>(ReadArray(tag & 0x0f));
+        if ((tag & 0xe0) == 0xa0) return ReadBytes(tag & 0x1f);
+
+        switch (tag) {
+            case 0xc0: return nullptr;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: case 0xd9: return ReadBytes(ReadBE(1));
+            case 0xc5: case 0xda: return ReadBytes(ReadBE(2));
+            case 0xc6: case 0xdb: return ReadBytes(ReadBE(4));
+            case 0xca: {
+                uint32_t bits = static_cast<uint32_t>(ReadBE(4));
+                float f;
+                std::memcpy(&f, &bits, sizeof(f));
+                return Finite(f);
+            }
+            case 0xcb: {
+                uint64_t bits = ReadBE(8);
+                double d;
+                std::memcpy(&d, &bits, sizeof(d));
+                return Finite(d);
+            }
+            case 0xcc: return Int(static_cast<int64_t>(ReadBE(1)));
+            case 0xcd: return Int(static_cast<int64_t>(ReadBE(2)));
+            case 0xce: return Int(static_cast<int64_t>(ReadBE(4)));
+            case 0xcf: {
+                uint64_t v = ReadBE(8);
+                if (v > static_cast<uint64_t>(INT64_MAX))
+                    throw std::runtime_error("msgpack integer out of range");
+                return Int(static_cast<int64_t>(v));
+            }
+            case 0xd0: return Int(static_cast<int8_t>(ReadBE(1)));
+            case 0xd1: return Int(static_cast<int16_t>(ReadBE(2)));
+            case 0xd2: return Int(static_cast<int32_t>(ReadBE(4)));
+            case 0xd3: return Int(static_cast<int64_t>(ReadBE(8)));
+            case 0xdc: return std::make_shared<BsonDocument>(ReadArray(ReadBE(2)));
+            case 0xdd: return std::make_shared<BsonDocument>(ReadArray(ReadBE(4)));
+            case 0xde: return std::make_shared<BsonDocument>(ReadMap(ReadBE(2)));
+            case 0xdf: return std::make_shared<BsonDocument>(ReadMap(ReadBE(4)));
+        }
+        throw std::runtime_error("unsupported msgpack type");
+    }
+};
+
+}  // namespace
+
+// A JSON request starts with '{' (or whitespace); a msgpack one with a map tag
+static bool IsMsgPackMap(const std::string& payload) {
+    if (payload.empty()) return false;
+    uint8_t tag = static_cast<uint8_t>(payload[0]);
+    return (tag & 0xf0) == 0x80 || tag == 0xde || tag == 0xdf;
+}
+
+BsonDocument Server::ParseMsgPack(const std::string& payload) {
+    const uint8_t* data = reinterpret_cast<const uint8_t*>(payload.data());
+    MsgPackReader reader{data, data + payload.size()};
+    BsonValue root = reader.ReadValue();
+    return *std::get<std::shared_ptr<BsonDocument>>(root);
+}
+
+// Add a freshly inserted record to every index on the collection
+static void IndexRecord(CollectionInfo* coll, const BsonDocument& doc, const RecordID& rid) {
+    for (auto& idx : coll->indexes) {
+        auto fit = doc.elements.find(idx.field_name);
+        if (fit != doc.elements.end()) {
+            std::string key_str;
+            if (std::holds_alternative<std::string>(fit->second))
+                key_str = std::get<std::string>(fit->second);
+            else if (std::holds_alternative<int32_t>(fit->second))
+                key_str = std::to_string(std::get<int32_t>(fit->second));
+            if (!key_str.empty()) idx.btree->Insert(key_str, rid);
+        }
+    }
+}
+
 // ============================================================================
-// ProcessCommand — route a JSON request to the engine
+// ProcessCommand — route a JSON or msgpack request to the engine
 // ============================================================================
 
 std::string Server::ProcessCommand(const std::string& request_json) {
     try {
-        BsonDocument req = ParseJSON(request_json);
+        BsonDocument req = IsMsgPackMap(request_json) ? ParseMsgPack(request_json)
+                                                       : ParseJSON(request_json);
 
         auto cmd_it = req.elements.find("cmd");
         if (cmd_it == req.elements.end() || !std::holds_alternative<std::string>(cmd_it->second)) {
@@ -454,17 +672,7 @@ std::string Server::ProcessCommand(const std::string& request_json) {
             RecordID rid = coll->heap_file->InsertRecord(insert_doc);
 
             // Update indexes
-            for (auto& idx : coll->indexes) {
-                auto fit = insert_doc.elements.find(idx.field_name);
-                if (fit != insert_doc.elements.end()) {
-                    std::string key_str;
-                    if (std::holds_alternative<std::string>(fit->second))
-                        key_str = std::get<std::string>(fit->second);
-                    else if (std::holds_alternative<int32_t>(fit->second))
-                        key_str = std::to_string(std::get<int32_t>(fit->second));
-                    if (!key_str.empty()) idx.btree->Insert(key_str, rid);
-                }
-            }
+            IndexRecord(coll, insert_doc, rid);
 
             std::ostringstream ss;
             ss << R"({"ok":true,"page":)" << rid.page_id << R"(,"slot":)" << rid.slot_id << "}";
@@ -473,6 +681,45 @@ std::string Server::ProcessCommand(const std::string& request_json) {
             return ss.str();
         }
 
+        // ---- insertMany ----
+        if (cmd == "insertMany") {
+            auto docs_it = req.elements.find("documents");
+            if (docs_it == req.elements.end()) return R"({"ok":false,"error":"missing 'documents'"})";
+            if (!std::holds_alternative<std::shared_ptr<BsonDocument>>(docs_it->second) ||
+                !std::get<std::shared_ptr<BsonDocument>>(docs_it->second)->is_array)
+                return R"({"ok":false,"error":"'documents' must be an array"})";
+
+            auto& docs = *std::get<std::shared_ptr<BsonDocument>>(docs_it->second);
+
+            // Every array element (null included) is keyed "0".."n-1"; collect
+            // them in array order before touching the heap, so a malformed
+            // array is rejected instead of partially inserted
+            std::vector<const BsonDocument*> batch;
+            int skipped = 0;
+            for (size_t i = 0; i < docs.elements.size(); i++) {
+                auto elem_it = docs.elements.find(std::to_string(i));
+                if (elem_it == docs.elements.end())
+                    return R"({"ok":false,"error":"malformed 'documents' array"})";
+                auto* elem = std::get_if<std::shared_ptr<BsonDocument>>(&elem_it->second);
+                if (elem && !(*elem)->is_array)
+                    batch.push_back(elem->get());
+                else
+                    skipped++;  // null / scalar / nested array elements aren't documents
+            }
+
+            for (const BsonDocument* insert_doc : batch) {
+                RecordID rid = coll->heap_file->InsertRecord(*insert_doc);
+                IndexRecord(coll, *insert_doc, rid);
+            }
+
+            std::ostringstream ss;
+            ss << R"({"ok":true,"inserted":)" << batch.size() << R"(,"skipped":)" << skipped << "}";
+
+            // One flush for the whole batch
+            bpm_->FlushAllPages();
+            return ss.str();
+        }
+
         // ---- find ----
         if (cmd == "find") {
             std::vector<Predicate> predicates;
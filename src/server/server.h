@@ -18,11 +18,15 @@
 // TCP Server — epoll-based, non-blocking, single-threaded event loop
 //
 // Wire protocol (length-prefixed JSON):
-//   Request:   [4 bytes big-endian length] [JSON payload]
+//   Request:   [4 bytes big-endian length] [JSON or MessagePack map payload]
 //   Response:  [4 bytes big-endian length] [JSON payload]
 //
+// A MessagePack request carries the same keys as the JSON forms below; it
+// is recognised by its leading map tag. Responses are always JSON.
+//
 // Request JSON:
 //   { "cmd": "insert", "collection": "users", "document": {...} }
+//   { "cmd": "insertMany", "collection": "users", "documents": [{...}, ...] }
 //   { "cmd": "find",   "collection": "users", "filter": {...} }
 //   { "cmd": "delete", "collection": "users", "filter": {...} }
 //   { "cmd": "update", "collection": "users", "filter": {...}, "update": {...} }
@@ -64,7 +68,9 @@ private:
 
     // ---- JSON helpers (reuse BsonDocument as quick parser) ----
     BsonDocument ParseJSON(const std::string& json);
+    BsonDocument ParseJSONArray(const std::string& json);
     std::string DocToJSON(const BsonDocument& doc);
+    BsonDocument ParseMsgPack(const std::string& payload);
 
     // ---- Engine components ----
     std::unique_ptr<DiskManager> disk_manager_;
@@ -32,6 +32,8 @@ using BsonValue = std::variant<
 
 struct BsonDocument{
     std::map<std::string,BsonValue> elements;
+    // Set for arrays parsed from a request (keyed "0".."n-1"); not persisted
+    bool is_array = false;
 
     void Add(const std::string& key, BsonValue value) {
         elements[key] = value;